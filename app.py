@@ -1,28 +1,40 @@
+import asyncio
 import json
+import time
+from collections.abc import Callable
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
-from claude_agent_sdk import (
-    AssistantMessage,
-    ClaudeAgentOptions,
-    ResultMessage,
-    SystemMessage,
-    query,
-)
+from rich.console import Group, RenderableType
 from rich.markdown import Markdown as RichMarkdown
 from rich.panel import Panel
 from textual.app import App, ComposeResult
 from textual.containers import Vertical
+from textual.reactive import reactive
+from textual.timer import Timer
 from rich.box import ROUNDED
-from textual.widgets import Static, Footer, Input, RichLog
+from textual.widgets import Static, Footer, Input
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from claude.claude_agent import (
     connect_client,
     create_claude_client,
+    disconnect_client,
+    load_sdk,
+    mcp_allowed_tools,
     stream_helpful_claude,
 )
 from claude.history import CommandHistory
 from claude.mcp_commands import McpAsyncCommand, McpCommandHandler
-from claude.mcp_config import McpConfigManager
-from claude.widgets import ASCIISpinner, HistoryInput, StatusBar
+from claude.mcp_config import MCP_SERVER_TYPES, McpConfigManager
+from claude.widgets import ASCIISpinner, ChatLog, HistoryInput, StatusBar
+
+if TYPE_CHECKING:
+    from claude_agent_sdk import ClaudeSDKClient
 
 
 # Message border colors (vivid)
@@ -33,6 +45,79 @@ SYSTEM_COLOR = "#33ff66"    # Vivid green
 
 HEADER_TEXT = "Claude SDK Tutor"
 
+# Panel styling per message kind, built once and shared by every write
+_PANEL_KW = dict(box=ROUNDED, padding=(1, 2))
+_USER_PANEL_KW = dict(_PANEL_KW, title="You", border_style=USER_COLOR)
+_CLAUDE_PANEL_KW = dict(_PANEL_KW, title="Claude", border_style=CLAUDE_COLOR)
+_TOOL_PANEL_KW = dict(_PANEL_KW, title="Tool", border_style=TOOL_COLOR)
+_SYSTEM_PANEL_KW = dict(_PANEL_KW, title="System", border_style=SYSTEM_COLOR)
+_PANEL_KW_BY_KIND = {
+    "user": _USER_PANEL_KW,
+    "claude": _CLAUDE_PANEL_KW,
+    "tool": _TOOL_PANEL_KW,
+    "system": _SYSTEM_PANEL_KW,
+}
+
+# Seconds a /mcp list reuses the last connection probe, and the probe's time limit
+MCP_STATUS_TTL = 60
+MCP_PROBE_TIMEOUT = 30
+
+# Rendered lines kept in the chat log; older output scrolls away
+MAX_LOG_LINES = 2000
+
+# Seconds to coalesce streamed text before re-rendering the Claude panel
+STREAM_FLUSH_INTERVAL = 0.1
+
+# Longest message whose parsed panel is cached; long text rarely repeats
+MAX_CACHED_MESSAGE_LEN = 2000
+
+
+@lru_cache(maxsize=4096)
+def _cached_markdown(text: str) -> RichMarkdown:
+    """Parse markdown once per distinct string."""
+    return RichMarkdown(text)
+
+
+@lru_cache(maxsize=512)
+def _cached_panel(message: str, kind: str) -> Panel:
+    """Build a finished message Panel once per distinct (message, kind)."""
+    return Panel(_cached_markdown(message), **_PANEL_KW_BY_KIND[kind])
+
+
+def _message_panel(message: str, kind: str) -> Panel:
+    """Build a message Panel, caching it only for short, repeatable text."""
+    if len(message) > MAX_CACHED_MESSAGE_LEN:
+        return Panel(RichMarkdown(message), **_PANEL_KW_BY_KIND[kind])
+    return _cached_panel(message, kind)
+
+
+def _mcp_key(mcp_servers: dict) -> str:
+    """Stable string identifying an MCP server config, for cache keys."""
+    return json.dumps(mcp_servers, sort_keys=True)
+
+
+def _format_tool_input(input: dict) -> str:
+    """Pretty-print tool input as JSON, using orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(input, option=orjson.OPT_INDENT_2).decode()
+        except TypeError:
+            pass  # e.g. non-string keys; stdlib json is more lenient
+    return json.dumps(input, indent=2)
+
+
+def _build_tool_panel(name: str, input: dict) -> Panel:
+    """Format a tool call as a Panel; safe to run off the event loop."""
+    input_str = _format_tool_input(input)
+    content = f"**{name}**\n```json\n{input_str}\n```"
+    # Tool payloads are mostly unique and can be large, so they are not cached
+    return Panel(RichMarkdown(content), **_TOOL_PANEL_KW)
+
+
+def _parse_text_blocks(texts: list[str]) -> list[RichMarkdown]:
+    """Parse complete text blocks as markdown; safe to run off the event loop."""
+    return [RichMarkdown(text) for text in texts]
+
 
 class MyApp(App):
     CSS = """
@@ -147,6 +232,10 @@ class MyApp(App):
     }
     """
 
+    # Whether a query or MCP probe is running, and what it is; drives the spinner
+    is_busy: reactive[bool] = reactive(False, init=False)
+    _busy_label: reactive[str] = reactive("Processing query...", init=False)
+
     def __init__(self):
         super().__init__()
         self.tutor_mode = True
@@ -154,23 +243,116 @@ class MyApp(App):
         self.mcp_config = McpConfigManager()
         self.mcp_handler = McpCommandHandler(self.mcp_config)
         self.mcp_add_state: dict | None = None  # For interactive /mcp add wizard
-        self.client = self._create_client()
+        self.client: ClaudeSDKClient | None = None  # Connected in on_mount
+        # Connected clients keyed by the settings they were created with, each
+        # with the event that tells its owning worker to disconnect it
+        self._client_cache: dict[tuple, tuple[ClaudeSDKClient, asyncio.Event]] = {}
+        self._client_lock = asyncio.Lock()
+        # Last MCP connection probe per server config: (monotonic time, status)
+        self._mcp_status_cache: dict[str, tuple[float, dict[str, str]]] = {}
         self.history = CommandHistory()
         self._query_running: bool = False  # Track if a query is active
-
-    def _create_client(self):
-        """Create a new Claude client with current settings."""
+        # Streaming state for the Claude panel currently being written
+        self._current_assistant_blocks: list[RichMarkdown] = []
+        self._current_panel_line: int | None = None
+        self._current_panel_end: int | None = None  # Log end after the panel
+        self._current_message_id: str | None = None
+        self._pending_texts: list[str] = []
+        self._flush_handle: Timer | None = None
+        self._flush_lock = asyncio.Lock()  # Keeps flushes in stream order
+
+    def _create_client(self, tutor_mode: bool, web_search: bool, mcp_servers: dict):
+        """Create a new Claude client with the given settings."""
         return create_claude_client(
-            tutor_mode=self.tutor_mode,
-            web_search=self.web_search_enabled,
-            mcp_servers=self.mcp_config.get_enabled_servers_for_sdk(),
+            tutor_mode=tutor_mode,
+            web_search=web_search,
+            mcp_servers=mcp_servers,
         )
 
+    async def _get_client(
+        self, tutor_mode: bool, web_search: bool, mcp_servers: dict
+    ) -> "ClaudeSDKClient":
+        """Return a connected client for the given settings.
+
+        Clients are cached per settings, so toggling back to an earlier
+        combination reuses its connection instead of reconnecting.
+        """
+        key = (tutor_mode, web_search, _mcp_key(mcp_servers))
+        async with self._client_lock:
+            cached = self._client_cache.get(key)
+            if cached is not None:
+                return cached[0]
+            client = self._create_client(tutor_mode, web_search, mcp_servers)
+            connected = asyncio.get_running_loop().create_future()
+            close = asyncio.Event()
+            self.run_worker(self._own_client(client, connected, close))
+            await asyncio.shield(connected)  # Raises if the connect failed
+            self._client_cache[key] = (client, close)
+        return client
+
+    async def _own_client(
+        self,
+        client: "ClaudeSDKClient",
+        connected: asyncio.Future,
+        close: asyncio.Event,
+    ) -> None:
+        """Connect a client, then disconnect it once close is set.
+
+        The SDK client holds a task group from connect() to disconnect(), so
+        both must run in the same task; this worker is that task.
+        """
+        try:
+            await connect_client(client)
+        except Exception as e:
+            connected.set_exception(e)
+            return
+        connected.set_result(None)
+        try:
+            await close.wait()
+        finally:
+            try:
+                await disconnect_client(client)
+            except Exception as e:
+                self.log.error(f"Error disconnecting Claude client: {e!r}")
+                if self.is_running:
+                    self.write_slash_message(f"**Error** disconnecting Claude: {e}")
+
+    async def _use_client(self, mcp_servers: dict) -> None:
+        """Switch to a connected client for the current settings.
+
+        Clients made for a different MCP config can never be reused, so they
+        are disconnected once the switch is done.
+        """
+        self.client = await self._get_client(
+            self.tutor_mode, self.web_search_enabled, mcp_servers
+        )
+        await self._reset_clients(keep_mcp=_mcp_key(mcp_servers))
+
+    async def _prewarm_client(self, mcp_servers: dict) -> None:
+        """Connect the opposite tutor mode in the background so /tutor is instant."""
+        try:
+            await self._get_client(
+                not self.tutor_mode, self.web_search_enabled, mcp_servers
+            )
+        except Exception:
+            pass  # A failed pre-warm just means the toggle connects on demand
+
+    async def _reset_clients(self, keep_mcp: str | None = None) -> None:
+        """Disconnect cached clients so the next one starts fresh.
+
+        With keep_mcp, clients created for that MCP config are left connected.
+        """
+        async with self._client_lock:
+            stale = [key for key in self._client_cache if key[2] != keep_mcp]
+            clients = [self._client_cache.pop(key) for key in stale]
+        for _client, close in clients:
+            close.set()
+
     def compose(self) -> ComposeResult:
         with Vertical(id="main"):
             yield Static(HEADER_TEXT, id="header")
             yield StatusBar(id="status-bar")
-            yield RichLog(markup=True, highlight=True)
+            yield ChatLog(max_lines=MAX_LOG_LINES, markup=True, highlight=True)
             yield ASCIISpinner(id="spinner")
             yield HistoryInput(
                 history=self.history,
@@ -179,118 +361,198 @@ class MyApp(App):
         yield Footer()
 
     async def on_mount(self) -> None:
-        self.query_one("#spinner", ASCIISpinner).display = False
-        self._update_status_bar()
-        await connect_client(self.client)
+        # Widgets live for the whole session, so look them up once
+        self._chat_log = self.query_one(ChatLog)
+        self._spinner = self.query_one("#spinner", ASCIISpinner)
+        self._input = self.query_one(HistoryInput)
+        self._status_bar = self.query_one("#status-bar", StatusBar)
+        # The first call reads the config file, so it runs in a worker thread
+        mcp_servers = await asyncio.to_thread(
+            self.mcp_config.get_enabled_servers_for_sdk
+        )
+        self._update_status_bar(mcp_servers)
+        # Reading history and connecting Claude overlap instead of queueing
+        await asyncio.gather(self._load_history(), self._start_client(mcp_servers))
+        self.run_worker(self._prewarm_client(mcp_servers))
+
+    async def _load_history(self) -> None:
+        await self.history.load()
+        self.run_worker(self.history.run_writer())
+
+    async def _start_client(self, mcp_servers: dict) -> None:
+        await load_sdk()
+        await self._use_client(mcp_servers)
+
+    def on_unmount(self) -> None:
+        # Persist anything the history writer had not reached yet
+        self.history.flush()
+
+    def watch_is_busy(self, busy: bool) -> None:
+        if busy:
+            self._spinner.start(self._busy_label)
+        else:
+            self._spinner.stop()
+
+    def watch__busy_label(self, label: str) -> None:
+        # A new activity while already busy relabels the running spinner
+        if self.is_busy:
+            self._spinner.start(label)
 
-    def _update_status_bar(self) -> None:
+    def _update_status_bar(self, mcp_servers: dict) -> None:
         """Update the status bar with current mode states."""
-        status_bar = self.query_one("#status-bar", StatusBar)
-        status_bar.tutor_on = self.tutor_mode
-        status_bar.web_on = self.web_search_enabled
-        status_bar.mcp_count = len(self.mcp_config.get_enabled_servers_for_sdk())
+        self._status_bar.tutor_on = self.tutor_mode
+        self._status_bar.web_on = self.web_search_enabled
+        self._status_bar.mcp_count = len(mcp_servers)
 
     def write_user_message(self, message: str) -> None:
-        log = self.query_one(RichLog)
-        log.write(Panel(
-            RichMarkdown(message),
-            title="You",
-            border_style=USER_COLOR,
-            box=ROUNDED,
-            padding=(1, 2),
-        ))
-
-    def write_system_message(self, message: str) -> None:
-        log = self.query_one(RichLog)
-        log.write(Panel(
-            RichMarkdown(message),
-            title="Claude",
-            border_style=CLAUDE_COLOR,
-            box=ROUNDED,
-            padding=(1, 2),
-        ))
-
-    def write_tool_message(self, name: str, input: dict) -> None:
-        log = self.query_one(RichLog)
-        input_str = json.dumps(input, indent=2)
-        content = f"**{name}**\n```json\n{input_str}\n```"
-        log.write(Panel(
-            RichMarkdown(content),
-            title="Tool",
-            border_style=TOOL_COLOR,
-            box=ROUNDED,
-            padding=(1, 2),
-        ))
+        self._chat_log.write(_message_panel(message, "user"))
+
+    async def write_assistant_text(self, texts: list[str]) -> None:
+        """Append complete text blocks to the current Claude panel.
+
+        Each block is parsed once, as-is, in a worker thread. While the panel
+        is still the last thing in the log it replaces its previous render;
+        once anything else has been written after it, or the log cannot be
+        truncated, a new panel starts below.
+        """
+        blocks = await asyncio.to_thread(_parse_text_blocks, texts)
+        log = self._chat_log
+        # Truncate and rewrite the panel in a single repaint
+        with self.batch_update():
+            mark = log.mark()
+            if (
+                self._current_panel_line is not None
+                and mark is not None
+                and mark == self._current_panel_end
+            ):
+                log.truncate(self._current_panel_line)
+                self._current_assistant_blocks.extend(blocks)
+            else:
+                self._current_panel_line = mark
+                self._current_assistant_blocks = blocks
+            log.write(Panel(self._assistant_renderable(), **_CLAUDE_PANEL_KW))
+            self._current_panel_end = log.mark()
+
+    def _assistant_renderable(self) -> RenderableType:
+        """Build the body of the current Claude panel from its blocks."""
+        parts: list[RenderableType] = []
+        for block in self._current_assistant_blocks:
+            if parts:
+                parts.append("")
+            parts.append(block)
+        return Group(*parts)
+
+    def _schedule_flush(self, text: str) -> None:
+        """Queue a streamed text block and render it on the next debounce tick."""
+        self._pending_texts.append(text)
+        if self._flush_handle is None:
+            self._flush_handle = self.set_timer(
+                STREAM_FLUSH_INTERVAL, self._on_flush_timer
+            )
+
+    async def _on_flush_timer(self) -> None:
+        # Forget the handle first so the flush cannot stop (cancel) this timer
+        self._flush_handle = None
+        await self._flush_assistant()
+
+    async def _flush_assistant(self) -> None:
+        """Render all queued text into the current Claude panel."""
+        if self._flush_handle is not None:
+            self._flush_handle.stop()
+            self._flush_handle = None
+        async with self._flush_lock:
+            if self._pending_texts:
+                texts, self._pending_texts = self._pending_texts, []
+                await self.write_assistant_text(texts)
+
+    async def end_assistant_turn(self) -> None:
+        """Close the current Claude panel so the next text starts a new one."""
+        await self._flush_assistant()
+        self._current_assistant_blocks = []
+        self._current_panel_line = None
+        self._current_panel_end = None
+        self._current_message_id = None
+
+    async def write_tool_message(self, name: str, input: dict) -> None:
+        # Large tool inputs are serialized and parsed in a worker thread
+        panel = await asyncio.to_thread(_build_tool_panel, name, input)
+        self._chat_log.write(panel)
 
     def write_slash_message(self, message: str) -> None:
-        log = self.query_one(RichLog)
-        log.write(Panel(
-            RichMarkdown(message),
-            title="System",
-            border_style=SYSTEM_COLOR,
-            box=ROUNDED,
-            padding=(1, 2),
-        ))
+        self._chat_log.write(_message_panel(message, "system"))
 
     def on_input_submitted(self, event: Input.Submitted) -> None:
         command = event.value.strip()
-        self.query_one(HistoryInput).value = ""
+        self._input.value = ""
         if command:
             self.history.add(command)
 
+        norm = command.lower()
+
         # Handle interactive MCP add wizard
         if self.mcp_add_state is not None:
-            if command.lower() == "/cancel":
+            if norm == "/cancel":
                 self.mcp_add_state = None
                 self.write_slash_message("Cancelled MCP server setup.")
                 return
             self._handle_mcp_add_step(command)
             return
 
-        if command == "/clear":
-            self.run_worker(self.clear_conversation())
+        worker = _SLASH_WORKERS.get(norm)
+        if worker is not None:
+            self.run_worker(worker(self))
             return
-        if command == "/tutor":
-            self.run_worker(self.toggle_tutor_mode())
+        handler = _SLASH_SYNC.get(norm)
+        if handler is not None:
+            handler(self)
             return
-        if command == "/togglewebsearch":
-            self.run_worker(self.toggle_web_search())
-            return
-        if command == "/help":
-            self.show_help()
-            return
-        if command.lower().startswith("/mcp"):
+        if norm.startswith("/mcp"):
             self._handle_mcp_command(command)
             return
         self.write_user_message(event.value)
-        self.query_one("#spinner", ASCIISpinner).start("Processing query...")
+        self._busy_label = "Processing query..."
+        self.is_busy = True
         self._query_running = True
         self.run_worker(self.get_response(event.value))
 
     async def clear_conversation(self) -> None:
-        self.query_one(RichLog).clear()
-        self.client = self._create_client()
-        await connect_client(self.client)
-        self._update_status_bar()
+        self._chat_log.clear()
+        # Nothing rendered before /clear needs to stay parsed
+        _cached_panel.cache_clear()
+        _cached_markdown.cache_clear()
+        await self._reset_clients()
+        mcp_servers = self.mcp_config.get_enabled_servers_for_sdk()
+        await self._use_client(mcp_servers)
+        self._update_status_bar(mcp_servers)
         self.write_slash_message("Context cleared")
+        self.run_worker(self._prewarm_client(mcp_servers))
 
     async def toggle_tutor_mode(self) -> None:
         self.tutor_mode = not self.tutor_mode
-        self.query_one(RichLog).clear()
-        self.client = self._create_client()
-        await connect_client(self.client)
-        self._update_status_bar()
         status = "enabled" if self.tutor_mode else "disabled"
-        self.write_slash_message(f"Tutor mode {status}")
+        await self._switch_client(f"Tutor mode {status}")
 
     async def toggle_web_search(self) -> None:
         self.web_search_enabled = not self.web_search_enabled
-        self.query_one(RichLog).clear()
-        self.client = self._create_client()
-        await connect_client(self.client)
-        self._update_status_bar()
         status = "enabled" if self.web_search_enabled else "disabled"
-        self.write_slash_message(f"Web search {status}")
+        await self._switch_client(f"Web search {status}")
+
+    async def _switch_client(self, message: str) -> None:
+        """Move to the client for the toggled settings and say so.
+
+        Each settings combination has its own conversation, so the transcript
+        left on screen is marked as unseen by the new client.
+        """
+        previous = self.client
+        mcp_servers = self.mcp_config.get_enabled_servers_for_sdk()
+        await self._use_client(mcp_servers)
+        self._update_status_bar(mcp_servers)
+        if self.client is not previous:
+            message += (
+                "\n\nSwitched to a separate conversation; "
+                "Claude does not see the messages above."
+            )
+        self.write_slash_message(message)
 
     def show_help(self) -> None:
         help_text = """**Available Commands**
@@ -313,7 +575,8 @@ class MyApp(App):
             )
         elif isinstance(result, McpAsyncCommand):
             # Async command needs connection testing
-            self.query_one("#spinner", ASCIISpinner).start("Testing MCP connections...")
+            self._busy_label = "Testing MCP connections..."
+            self.is_busy = True
             self.run_worker(self._test_mcp_connections(result))
         else:
             self.write_slash_message(result)
@@ -333,26 +596,20 @@ class MyApp(App):
                     )
                 return
 
-            # Build allowed tools for the test
-            allowed_tools = [f"mcp__{name}__*" for name in mcp_servers]
-
-            options = ClaudeAgentOptions(
-                mcp_servers=mcp_servers,
-                allowed_tools=allowed_tools,
-                max_turns=1,
-            )
-
-            connection_status: dict[str, str] = {}
-
-            # Run a minimal query just to get the init message with MCP status
-            async for message in query(prompt="test", options=options):
-                if isinstance(message, SystemMessage) and message.subtype == "init":
-                    mcp_info = message.data.get("mcp_servers", [])
-                    for server in mcp_info:
-                        name = server.get("name", "unknown")
-                        status = server.get("status", "unknown")
-                        connection_status[name] = status
-                    break
+            # Reuse a recent probe for /mcp list; /mcp test always re-probes
+            key = json.dumps(mcp_servers, sort_keys=True)
+            cached = self._mcp_status_cache.get(key)
+            if (
+                cmd.command == "list"
+                and cached is not None
+                and time.monotonic() - cached[0] < MCP_STATUS_TTL
+            ):
+                connection_status = cached[1]
+            else:
+                connection_status = await asyncio.wait_for(
+                    self._probe_mcp_status(mcp_servers), timeout=MCP_PROBE_TIMEOUT
+                )
+                self._mcp_status_cache[key] = (time.monotonic(), connection_status)
 
             # Display results based on command
             if cmd.command == "test":
@@ -363,104 +620,168 @@ class MyApp(App):
                 self.write_slash_message(
                     self.mcp_handler.handle_list(cmd.args, connection_status)
                 )
+        except TimeoutError:
+            self.write_slash_message(
+                f"**Error** testing MCP connections: no response after {MCP_PROBE_TIMEOUT}s"
+            )
         except Exception as e:
             self.write_slash_message(f"**Error** testing MCP connections: {e}")
         finally:
-            self.query_one("#spinner", ASCIISpinner).stop()
+            self.is_busy = False
+
+    async def _probe_mcp_status(self, mcp_servers: dict) -> dict[str, str]:
+        """Start a throwaway session and read MCP server status from its init message."""
+        from claude_agent_sdk import ClaudeAgentOptions, SystemMessage, query
+
+        # Build allowed tools for the test
+        allowed_tools = list(mcp_allowed_tools(tuple(sorted(mcp_servers))))
+
+        options = ClaudeAgentOptions(
+            mcp_servers=mcp_servers,
+            allowed_tools=allowed_tools,
+            max_turns=1,
+        )
+
+        connection_status: dict[str, str] = {}
+
+        # Run a minimal query just to get the init message with MCP status
+        async for message in query(prompt="test", options=options):
+            if isinstance(message, SystemMessage) and message.subtype == "init":
+                mcp_info = message.data.get("mcp_servers", [])
+                for server in mcp_info:
+                    name = server.get("name", "unknown")
+                    status = server.get("status", "unknown")
+                    connection_status[name] = status
+                break
+        return connection_status
 
     def _handle_mcp_add_step(self, user_input: str) -> None:
         """Handle a step in the interactive MCP add wizard."""
         state = self.mcp_add_state
         if state is None:
             return
+        self._MCP_ADD_STEPS[state["step"]](self, state, user_input)
 
-        step = state["step"]
-
-        if step == 0:
-            # Got server name
-            name = user_input.strip()
-            if not name:
-                self.write_slash_message("**Error**: Name cannot be empty. Try again:")
-                return
-            if self.mcp_config.get_server(name):
-                self.write_slash_message(
-                    f"**Error**: Server `{name}` already exists. Enter a different name:"
-                )
-                return
-            state["name"] = name
-            state["step"] = 1
+    def _mcp_add_name_step(self, state: dict, user_input: str) -> None:
+        """Wizard step 0: got server name."""
+        name = user_input.strip()
+        if not name:
+            self.write_slash_message("**Error**: Name cannot be empty. Try again:")
+            return
+        if self.mcp_config.get_server(name):
             self.write_slash_message(
-                "Select server type:\n- `stdio` - Local process\n- `sse` - Server-Sent Events\n- `http` - HTTP endpoint"
+                f"**Error**: Server `{name}` already exists. Enter a different name:"
             )
+            return
+        state["name"] = name
+        state["step"] = 1
+        self.write_slash_message(
+            "Select server type:\n- `stdio` - Local process\n- `sse` - Server-Sent Events\n- `http` - HTTP endpoint"
+        )
 
-        elif step == 1:
-            # Got server type
-            server_type = user_input.strip().lower()
-            if server_type not in ("stdio", "sse", "http"):
-                self.write_slash_message(
-                    f"**Error**: Invalid type `{server_type}`. Enter `stdio`, `sse`, or `http`:"
-                )
-                return
-            state["type"] = server_type
-            state["step"] = 2
-            if server_type == "stdio":
-                self.write_slash_message("Enter command to run (e.g., `npx`):")
-            else:
-                self.write_slash_message("Enter server URL:")
-
-        elif step == 2:
-            # Got command or URL
-            value = user_input.strip()
-            if not value:
-                self.write_slash_message("**Error**: Value cannot be empty. Try again:")
-                return
+    def _mcp_add_type_step(self, state: dict, user_input: str) -> None:
+        """Wizard step 1: got server type."""
+        server_type = user_input.strip().lower()
+        if server_type not in MCP_SERVER_TYPES:
+            self.write_slash_message(
+                f"**Error**: Invalid type `{server_type}`. Enter `stdio`, `sse`, or `http`:"
+            )
+            return
+        state["type"] = server_type
+        state["step"] = 2
+        if server_type == "stdio":
+            self.write_slash_message("Enter command to run (e.g., `npx`):")
+        else:
+            self.write_slash_message("Enter server URL:")
 
-            if state["type"] == "stdio":
-                state["data"]["command"] = value
-                state["step"] = 3
-                self.write_slash_message(
-                    "Enter arguments (space-separated, or leave empty):"
-                )
-            else:
-                # SSE or HTTP - URL provided, we're done
-                config = {"type": state["type"], "url": value}
-                self.mcp_config.add_server(state["name"], config)
-                self.write_slash_message(
-                    f"**Added** server `{state['name']}` ({state['type']})\n\n"
-                    "Use `/clear` to reconnect with new MCP servers."
-                )
-                self.mcp_add_state = None
+    def _mcp_add_target_step(self, state: dict, user_input: str) -> None:
+        """Wizard step 2: got command or URL."""
+        value = user_input.strip()
+        if not value:
+            self.write_slash_message("**Error**: Value cannot be empty. Try again:")
+            return
 
-        elif step == 3:
-            # Got args for stdio command
-            args = user_input.strip().split() if user_input.strip() else []
-            config = {
-                "type": "stdio",
-                "command": state["data"]["command"],
-                "args": args,
-            }
+        if state["type"] == "stdio":
+            state["data"]["command"] = value
+            state["step"] = 3
+            self.write_slash_message(
+                "Enter arguments (space-separated, or leave empty):"
+            )
+        else:
+            # SSE or HTTP - URL provided, we're done
+            config = {"type": state["type"], "url": value}
             self.mcp_config.add_server(state["name"], config)
             self.write_slash_message(
-                f"**Added** server `{state['name']}` (stdio)\n\n"
+                f"**Added** server `{state['name']}` ({state['type']})\n\n"
                 "Use `/clear` to reconnect with new MCP servers."
             )
             self.mcp_add_state = None
 
+    def _mcp_add_args_step(self, state: dict, user_input: str) -> None:
+        """Wizard step 3: got args for stdio command."""
+        args = user_input.strip().split() if user_input.strip() else []
+        config = {
+            "type": "stdio",
+            "command": state["data"]["command"],
+            "args": args,
+        }
+        self.mcp_config.add_server(state["name"], config)
+        self.write_slash_message(
+            f"**Added** server `{state['name']}` (stdio)\n\n"
+            "Use `/clear` to reconnect with new MCP servers."
+        )
+        self.mcp_add_state = None
+
+    # Wizard steps indexed by mcp_add_state["step"]
+    _MCP_ADD_STEPS = (
+        _mcp_add_name_step,
+        _mcp_add_type_step,
+        _mcp_add_target_step,
+        _mcp_add_args_step,
+    )
+
     async def get_response(self, text: str) -> None:
+        import claude_agent_sdk
+        from claude_agent_sdk import (
+            AssistantMessage,
+            ResultMessage,
+            TextBlock,
+            ToolUseBlock,
+        )
+
+        # ServerToolUseBlock only exists in newer SDK releases
+        tool_blocks = tuple(
+            block_type
+            for block_type in (
+                ToolUseBlock,
+                getattr(claude_agent_sdk, "ServerToolUseBlock", None),
+            )
+            if block_type is not None
+        )
+
         try:
             async for message in stream_helpful_claude(self.client, text):
-                if isinstance(message, AssistantMessage):
+                message_type = type(message)
+                if message_type is AssistantMessage:
+                    # Blocks of one API message share a panel; a new message starts
+                    # one. SDKs without message_id give each message its own panel.
+                    message_id = getattr(message, "message_id", None)
+                    if message_id is None or message_id != self._current_message_id:
+                        await self.end_assistant_turn()
+                        self._current_message_id = message_id
                     for block in message.content:
-                        if hasattr(block, "text"):
-                            self.write_system_message(block.text)
-                        elif hasattr(block, "name"):
-                            self.write_tool_message(
-                                block.name, getattr(block, "input", {})
-                            )
-                elif isinstance(message, ResultMessage):
-                    pass  # Might want to add logging later
+                        block_type = type(block)
+                        if block_type is TextBlock:
+                            if block.text.strip():
+                                self._schedule_flush(block.text)
+                        elif block_type in tool_blocks:
+                            await self.end_assistant_turn()
+                            await self.write_tool_message(block.name, block.input)
+                elif message_type is ResultMessage:
+                    await self.end_assistant_turn()
         finally:
-            self.query_one("#spinner", ASCIISpinner).stop()
+            await self.end_assistant_turn()
+            self.is_busy = False
             self._query_running = False
 
     def action_cancel_query(self) -> None:
@@ -477,12 +798,35 @@ class MyApp(App):
             pass  # Ignore errors if not connected or no active query
         finally:
             self._query_running = False
-            self.query_one("#spinner", ASCIISpinner).stop()
+            self.is_busy = False
+
+
+# Slash commands that run as async workers, and those handled inline
+_SLASH_WORKERS = {
+    "/clear": MyApp.clear_conversation,
+    "/tutor": MyApp.toggle_tutor_mode,
+    "/togglewebsearch": MyApp.toggle_web_search,
+}
+_SLASH_SYNC = {
+    "/help": MyApp.show_help,
+}
+
+
+def _loop_factory() -> Callable[[], asyncio.AbstractEventLoop] | None:
+    """Return uvloop's event loop factory if uvloop is installed."""
+    try:
+        import uvloop
+    except ImportError:
+        return None
+    return uvloop.new_event_loop
 
 
 def main():
     app = MyApp()
-    app.run()
+    # Runner shuts down async generators and the default executor before
+    # closing the loop, exactly as app.run() does on the default loop
+    with asyncio.Runner(loop_factory=_loop_factory()) as runner:
+        runner.run(app.run_async())
 
 
 if __name__ == "__main__":
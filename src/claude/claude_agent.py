@@ -1,5 +1,13 @@
-from claude_agent_sdk import ClaudeSDKClient, ClaudeAgentOptions
+import asyncio
+import importlib
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
+if TYPE_CHECKING:
+    # The SDK takes about a second to import, so it is loaded on first use
+    from claude_agent_sdk import ClaudeSDKClient
+
+# A fixed string, so every client created by /clear and the toggles sends the same prompt
 TUTOR_SYSTEM_PROMPT = """You are a programming tutor. Your role is to help users learn and understand code, not to write code for them.
 
 When a user asks a question:
@@ -11,30 +19,48 @@ When a user asks a question:
 
 Never write complete solutions for them. Instead, help them develop the skills to solve problems independently."""
 
+# Tools every client gets, and the extra ones enabled by web search
+BASE_TOOLS = ("Read", "Glob", "Grep")
+WEB_TOOLS = ("WebSearch", "WebFetch")
+
+
+@lru_cache(maxsize=64)
+def mcp_allowed_tools(server_names: tuple[str, ...]) -> tuple[str, ...]:
+    """Allowed-tool patterns granting every tool of each MCP server."""
+    return tuple("mcp__" + name + "__*" for name in server_names)
+
 
 def create_claude_client(
     tutor_mode: bool = True,
     web_search: bool = False,
     mcp_servers: dict | None = None,
-) -> ClaudeSDKClient:
-    tools = ["Read", "Glob", "Grep"]
-    if web_search:
-        tools.extend(["WebSearch", "WebFetch"])
+) -> "ClaudeSDKClient":
+    from claude_agent_sdk import ClaudeAgentOptions, ClaudeSDKClient
+
+    tools = list(BASE_TOOLS + WEB_TOOLS if web_search else BASE_TOOLS)
     if mcp_servers:
         # Allow all tools from each configured MCP server
-        for server_name in mcp_servers:
-            tools.append(f"mcp__{server_name}__*")
+        tools.extend(mcp_allowed_tools(tuple(sorted(mcp_servers))))
     options = ClaudeAgentOptions(allowed_tools=tools, mcp_servers=mcp_servers or {})
     if tutor_mode:
         options.system_prompt = TUTOR_SYSTEM_PROMPT
     return ClaudeSDKClient(options=options)
 
 
-async def connect_client(client: ClaudeSDKClient) -> None:
+async def load_sdk() -> None:
+    """Import the Claude Agent SDK in a worker thread, keeping the UI responsive."""
+    await asyncio.to_thread(importlib.import_module, "claude_agent_sdk")
+
+
+async def connect_client(client: "ClaudeSDKClient") -> None:
     await client.connect()
 
 
-async def stream_helpful_claude(client: ClaudeSDKClient, text: str):
+async def disconnect_client(client: "ClaudeSDKClient") -> None:
+    await client.disconnect()
+
+
+async def stream_helpful_claude(client: "ClaudeSDKClient", text: str):
     await client.query(prompt=text)
     async for message in client.receive_response():
         yield message
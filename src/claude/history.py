@@ -1,3 +1,7 @@
+import asyncio
+import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
 
 from platformdirs import user_data_dir
@@ -7,39 +11,146 @@ class CommandHistory:
     """Manages command history with persistence to disk."""
 
     MAX_ENTRIES = 1000
+    # Lines the file may hold before it is rewritten down to MAX_ENTRIES
+    COMPACT_THRESHOLD = MAX_ENTRIES * 2
 
     def __init__(self):
-        self.history: list[str] = []
+        # Unique commands, least to most recently used
+        self.history: OrderedDict[str, None] = OrderedDict()
+        self._entries_cache: list[str] | None = None  # Navigation snapshot of history
         self.index: int = -1
         self.temp_input: str = ""
         self._history_file = Path(user_data_dir("claude-sdk-tutor")) / "command_history.txt"
-        self._load()
+        # File state, shared with the writer's worker thread under _file_lock
+        self._file_lock = threading.Lock()
+        self._lines_written: int = 0  # Lines currently in the history file
+        self._needs_newline: bool = False  # File ends without a line terminator
+        # Commands waiting for the background writer; None once flushed
+        self._save_queue: asyncio.Queue[str] | None = asyncio.Queue()
 
-    def _load(self) -> None:
-        """Load history from disk."""
-        if self._history_file.exists():
+    async def load(self) -> None:
+        """Load history from disk in a worker thread.
+
+        Commands added before the load finishes stay the most recent entries.
+        """
+        commands, lines, needs_newline = await asyncio.to_thread(self._read)
+        added = list(self.history)
+        self.history = OrderedDict()
+        for command in commands:
+            self._promote(command)
+        for command in added:
+            self._promote(command)
+        self._lines_written += lines
+        self._needs_newline = needs_newline
+
+    def _read(self) -> tuple[list[str], int, bool]:
+        """Read commands from disk with the file's line count and whether it
+        lacks a trailing newline."""
+        if not self._history_file.exists():
+            return [], 0, False
+        commands: list[str] = []
+        lines = 0
+        line = ""
+        try:
+            with self._history_file.open(encoding="utf-8") as f:
+                for line in f:
+                    lines += 1
+                    command = line.rstrip("\r\n")
+                    if command:
+                        commands.append(command)
+        except (OSError, UnicodeDecodeError):
+            return [], 0, False
+        return commands, lines, bool(line) and not line.endswith("\n")
+
+    def _append(self, command: str) -> bool:
+        """Append a single command to the history file.
+
+        Returns True once the file has grown past COMPACT_THRESHOLD lines.
+        """
+        with self._file_lock:
             try:
-                lines = self._history_file.read_text().splitlines()
-                self.history = lines[-self.MAX_ENTRIES :]
+                self._history_file.parent.mkdir(parents=True, exist_ok=True)
+                with self._history_file.open("a", encoding="utf-8") as f:
+                    if self._needs_newline:
+                        f.write("\n")
+                    f.write(command + "\n")
             except OSError:
-                self.history = []
+                return False
+            self._needs_newline = False
+            self._lines_written += 1
+            return self._lines_written > self.COMPACT_THRESHOLD
 
-    def _save(self) -> None:
-        """Save history to disk."""
-        try:
-            self._history_file.parent.mkdir(parents=True, exist_ok=True)
-            self._history_file.write_text("\n".join(self.history[-self.MAX_ENTRIES :]))
-        except OSError:
-            pass
+    def _compact(self, recent: list[str]) -> None:
+        """Atomically rewrite the history file with only the given entries."""
+        with self._file_lock:
+            try:
+                tmp_file = self._history_file.with_suffix(".tmp")
+                tmp_file.write_text(
+                    "".join(f"{command}\n" for command in recent), encoding="utf-8"
+                )
+                os.replace(tmp_file, self._history_file)
+            except OSError:
+                return
+            self._lines_written = len(recent)
+
+    def _save(self, command: str) -> None:
+        """Append a command and compact the file, blocking the caller."""
+        if self._append(command):
+            self._compact(list(self.history))
+
+    async def run_writer(self) -> None:
+        """Persist added commands from a background task until cancelled.
+
+        add() only queues the command; the file append happens in a worker
+        thread so slow disks never block the caller's event loop. Start this
+        after load() so appends never race the initial read.
+        """
+        queue = self._save_queue
+        if queue is None:
+            return
+        while True:
+            command = await queue.get()
+            try:
+                if await asyncio.to_thread(self._append, command):
+                    # Snapshot here: history is only ever mutated on this thread
+                    await asyncio.to_thread(self._compact, list(self.history))
+            finally:
+                queue.task_done()
+
+    def flush(self) -> None:
+        """Write any still-queued commands and return to synchronous saving."""
+        queue, self._save_queue = self._save_queue, None
+        if queue is None:
+            return
+        while not queue.empty():
+            self._save(queue.get_nowait())
+            queue.task_done()
+
+    def _promote(self, command: str) -> None:
+        """Make command the most recent entry, dropping any earlier copy."""
+        self.history.pop(command, None)
+        self.history[command] = None
+        while len(self.history) > self.MAX_ENTRIES:
+            self.history.popitem(last=False)
+        self._entries_cache = None
+
+    def _entries(self) -> list[str]:
+        """History as an indexable list, rebuilt only after it changes."""
+        if self._entries_cache is None:
+            self._entries_cache = list(self.history)
+        return self._entries_cache
 
     def add(self, command: str) -> None:
-        """Add a command to history, skipping consecutive duplicates."""
+        """Add a command to history, moving an earlier duplicate to the end."""
         command = command.strip()
         if not command:
             return
-        if not self.history or self.history[-1] != command:
-            self.history.append(command)
-            self._save()
+        if next(reversed(self.history), None) != command:
+            self._promote(command)
+            if self._save_queue is not None:
+                self._save_queue.put_nowait(command)
+            else:
+                self._save(command)
         self.reset_navigation()
 
     def reset_navigation(self) -> None:
@@ -49,25 +160,27 @@ class CommandHistory:
 
     def navigate_up(self, current_input: str) -> str:
         """Navigate to previous command in history."""
-        if not self.history:
+        entries = self._entries()
+        if not entries:
             return current_input
 
         if self.index == -1:
             self.temp_input = current_input
-            self.index = len(self.history) - 1
+            self.index = len(entries) - 1
         elif self.index > 0:
             self.index -= 1
 
-        return self.history[self.index]
+        return entries[self.index]
 
     def navigate_down(self, current_input: str) -> str:
         """Navigate to next command in history, or restore original input."""
         if self.index == -1:
             return current_input
 
-        if self.index < len(self.history) - 1:
+        entries = self._entries()
+        if self.index < len(entries) - 1:
             self.index += 1
-            return self.history[self.index]
+            return entries[self.index]
         else:
             self.index = -1
             return self.temp_input
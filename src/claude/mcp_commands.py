@@ -2,7 +2,32 @@
 
 from dataclasses import dataclass
 
-from .mcp_config import McpConfigManager, McpServerEntry
+from .mcp_config import MCP_SERVER_TYPES, McpConfigManager
+
+_HELP_TEXT = """**MCP Server Commands**
+
+- `/mcp list` - List all configured servers with connection status
+- `/mcp test [name]` - Test MCP server connections
+- `/mcp add` - Add a new server (interactive)
+- `/mcp add <name> <type> <cmd|url> [args]` - Add server directly
+- `/mcp remove <name>` - Remove a server
+- `/mcp enable <name>` - Enable a server
+- `/mcp disable <name>` - Disable a server
+- `/mcp status [name]` - Show server config details
+- `/mcp help` - Show this help
+
+**Server Types**
+- `stdio` - Local process (command + args)
+- `sse` - Server-Sent Events endpoint (URL)
+- `http` - HTTP endpoint (URL)"""
+
+# Title and column rows of the /mcp list table, and the format of each row
+_LIST_HEADER = (
+    "**MCP Servers**\n\n"
+    "| Name | Type | Enabled | Connection | Target |\n"
+    "|------|------|---------|------------|--------|\n"
+)
+_ROW_FMT = "| {} | {} | {} | {} | {} |".format
 
 
 @dataclass
@@ -16,25 +41,30 @@ class McpAsyncCommand:
 class McpCommandHandler:
     """Handles /mcp slash commands."""
 
+    # Subcommands that need async handling (connection testing)
+    _ASYNC_SUBCOMMANDS = frozenset({"test", "list"})
+
     def __init__(self, config_manager: McpConfigManager):
         self.config = config_manager
+        # Rendered output tagged with the config version it was built from
+        self._list_cache: tuple[tuple, str] | None = None
+        self._summary_cache: tuple[int, str] | None = None
 
     def parse_command(self, command: str) -> tuple[str, list[str]]:
         """Parse /mcp command into subcommand and args.
 
         Example: "/mcp add myserver" -> ("add", ["myserver"])
         """
-        parts = command.strip().split()
+        text = command.strip()
         # Remove /mcp prefix if present
-        if parts and parts[0].lower() == "/mcp":
-            parts = parts[1:]
+        if text[:4].lower() == "/mcp" and (len(text) == 4 or text[4].isspace()):
+            text = text[4:].lstrip()
 
-        if not parts:
+        if not text:
             return "help", []
 
-        subcommand = parts[0].lower()
-        args = parts[1:]
-        return subcommand, args
+        head, *rest = text.split(maxsplit=1)
+        return head.lower(), rest[0].split() if rest else []
 
     def handle_command(self, command: str) -> str | None | McpAsyncCommand:
         """Handle a /mcp command.
@@ -46,52 +76,44 @@ class McpCommandHandler:
         """
         subcommand, args = self.parse_command(command)
 
-        # Commands that need async handling (connection testing)
-        if subcommand in ("test", "list"):
+        if subcommand in self._ASYNC_SUBCOMMANDS:
             return McpAsyncCommand(command=subcommand, args=args)
 
-        handlers = {
-            "add": self.handle_add,
-            "remove": self.handle_remove,
-            "enable": self.handle_enable,
-            "disable": self.handle_disable,
-            "status": self.handle_status,
-            "help": self.handle_help,
-        }
-
-        handler = handlers.get(subcommand, self.handle_help)
-        return handler(args)
+        handler = self._HANDLERS.get(subcommand, McpCommandHandler.handle_help)
+        return handler(self, args)
 
     def handle_list(
         self, _args: list[str], connection_status: dict[str, str] | None = None
     ) -> str:
         """List all configured MCP servers with optional connection status."""
+        key = (
+            self.config.version,
+            frozenset(connection_status.items()) if connection_status else None,
+        )
+        if self._list_cache is not None and self._list_cache[0] == key:
+            return self._list_cache[1]
+        result = self._render_list(connection_status)
+        self._list_cache = (key, result)
+        return result
+
+    def _render_list(self, connection_status: dict[str, str] | None) -> str:
         servers = self.config.list_servers()
 
         if not servers:
             return "**MCP Servers**\n\nNo servers configured. Use `/mcp add` to add one."
 
-        lines = ["**MCP Servers**\n"]
-        lines.append("| Name | Type | Enabled | Connection | Target |")
-        lines.append("|------|------|---------|------------|--------|")
-
-        for server in servers:
-            server_type = server.config.get("type", "stdio")
-            enabled = "yes" if server.enabled else "no"
-            target = self._get_target_display(server)
-
-            if connection_status and server.name in connection_status:
-                conn = connection_status[server.name]
-            elif not server.enabled:
-                conn = "—"
-            else:
-                conn = "unknown"
-
-            lines.append(
-                f"| {server.name} | {server_type} | {enabled} | {conn} | {target} |"
+        status = connection_status or {}
+        rows = [
+            _ROW_FMT(
+                server.name,
+                server.config.get("type", "stdio"),
+                "yes" if server.enabled else "no",
+                status.get(server.name, "unknown" if server.enabled else "—"),
+                server.target,
             )
-
-        return "\n".join(lines)
+            for server in servers
+        ]
+        return _LIST_HEADER + "\n".join(rows)
 
     def handle_test(
         self, args: list[str], connection_status: dict[str, str]
@@ -127,21 +149,6 @@ class McpCommandHandler:
         lines.append(f"\n**Summary**: {connected} connected, {failed} failed")
         return "\n".join(lines)
 
-    def _get_target_display(self, server: McpServerEntry) -> str:
-        """Get display string for server target."""
-        config = server.config
-        server_type = config.get("type", "")
-
-        if server_type == "stdio":
-            cmd = config.get("command", "")
-            args = config.get("args", [])
-            if args:
-                return f"{cmd} {' '.join(args[:2])}{'...' if len(args) > 2 else ''}"
-            return cmd
-        elif server_type in ("sse", "http"):
-            return config.get("url", "")
-        return "—"
-
     def handle_add(self, args: list[str]) -> str | None:
         """Handle /mcp add command.
 
@@ -157,7 +164,7 @@ class McpCommandHandler:
         name = args[0]
         server_type = args[1].lower()
 
-        if server_type not in ("stdio", "sse", "http"):
+        if server_type not in MCP_SERVER_TYPES:
             return f"**Error**: Invalid type `{server_type}`. Must be stdio, sse, or http."
 
         if self.config.get_server(name):
@@ -206,11 +213,22 @@ class McpCommandHandler:
 
     def handle_status(self, args: list[str]) -> str:
         """Handle /mcp status [name] command."""
+        if args:
+            return self._render_status(args)
+        # Only the summary is cached; per-server output is keyed on user input
+        version = self.config.version
+        if self._summary_cache is not None and self._summary_cache[0] == version:
+            return self._summary_cache[1]
+        result = self._render_status(args)
+        self._summary_cache = (version, result)
+        return result
+
+    def _render_status(self, args: list[str]) -> str:
         if not args:
             # Show summary status
-            servers = self.config.list_servers()
-            enabled = sum(1 for s in servers if s.enabled)
-            return f"**MCP Status**: {enabled}/{len(servers)} servers enabled"
+            enabled = self.config.enabled_count()
+            total = self.config.len_servers()
+            return f"**MCP Status**: {enabled}/{total} servers enabled"
 
         name = args[0]
         server = self.config.get_server(name)
@@ -224,8 +242,8 @@ class McpCommandHandler:
         server_type = server.config.get("type", "")
         if server_type == "stdio":
             cmd = server.config.get("command", "")
-            args_list = server.config.get("args", [])
-            full_cmd = f"{cmd} {' '.join(args_list)}".strip()
+            args_list = server.config.get("args") or ()
+            full_cmd = f"{cmd} {' '.join(args_list)}" if args_list else cmd
             lines.append(f"- **Command**: `{full_cmd}`")
             env = server.config.get("env", {})
             if env:
@@ -238,19 +256,14 @@ class McpCommandHandler:
 
     def handle_help(self, _args: list[str]) -> str:
         """Show help for /mcp commands."""
-        return """**MCP Server Commands**
-
-- `/mcp list` - List all configured servers with connection status
-- `/mcp test [name]` - Test MCP server connections
-- `/mcp add` - Add a new server (interactive)
-- `/mcp add <name> <type> <cmd|url> [args]` - Add server directly
-- `/mcp remove <name>` - Remove a server
-- `/mcp enable <name>` - Enable a server
-- `/mcp disable <name>` - Disable a server
-- `/mcp status [name]` - Show server config details
-- `/mcp help` - Show this help
-
-**Server Types**
-- `stdio` - Local process (command + args)
-- `sse` - Server-Sent Events endpoint (URL)
-- `http` - HTTP endpoint (URL)"""
+        return _HELP_TEXT
+
+    # Synchronous subcommands and the methods that handle them
+    _HANDLERS = {
+        "add": handle_add,
+        "remove": handle_remove,
+        "enable": handle_enable,
+        "disable": handle_disable,
+        "status": handle_status,
+        "help": handle_help,
+    }
@@ -3,18 +3,89 @@
 import json
 import os
 import re
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-@dataclass
+# Transports the SDK accepts for MCP servers
+MCP_SERVER_TYPES = frozenset({"stdio", "sse", "http"})
+# Transports whose target is a URL rather than a command
+_URL_TYPES = frozenset({"sse", "http"})
+
+# ${VAR_NAME} references in config values
+_ENV_VAR_RE = re.compile(r"\$\{([^}]+)\}")
+
+
+def _loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode()
+
+
+def _env_value(match: re.Match[str]) -> str:
+    return os.environ.get(match.group(1), "")
+
+
+def _target_display(config: dict[str, Any]) -> str:
+    """Display string for a server's command or URL."""
+    server_type = config.get("type", "")
+
+    if server_type == "stdio":
+        cmd = config.get("command", "")
+        args = config.get("args") or ()
+        if args:
+            head = " ".join(args[:2])
+            return f"{cmd} {head}{'...' if len(args) > 2 else ''}"
+        return cmd
+    if server_type in _URL_TYPES:
+        return config.get("url", "")
+    return "—"
+
+
+def _referenced_env_vars(value: Any) -> frozenset[str]:
+    """Names of the environment variables referenced anywhere in value."""
+    names: set[str] = set()
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            if "$" in item:
+                names.update(_ENV_VAR_RE.findall(item))
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+    return frozenset(names)
+
+
+@dataclass(slots=True, frozen=True)
 class McpServerEntry:
     """An MCP server configuration entry."""
 
     name: str
     enabled: bool
     config: dict[str, Any]
+    target: str = field(init=False, repr=False, compare=False)
+    # Environment variables the config refers to; empty means nothing to expand
+    env_vars: frozenset[str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "target", _target_display(self.config))
+        object.__setattr__(self, "env_vars", _referenced_env_vars(self.config))
 
 
 @dataclass
@@ -33,108 +104,210 @@ class McpConfigManager:
 
     def __init__(self):
         self._config: McpConfig = McpConfig()
-        self._load()
+        self._version = 0  # Bumped on every change to the server set
+        self._dirty = False  # Changes not yet written to disk
+        self._in_batch = False  # Inside batch(); saving is deferred
+        self._entries: dict[str, McpServerEntry] = {}  # Views of _config.servers
+        self._enabled_count = 0  # Enabled servers, counted with the entries
+        self._loaded = False  # The file is read on first use
+        # Variables referenced by enabled servers, and the last SDK result
+        # keyed on the version and those variables' values
+        self._sdk_env_vars: tuple[str, ...] = ()
+        self._sdk_cache: tuple[tuple, dict[str, dict[str, Any]]] | None = None
+
+    @property
+    def version(self) -> int:
+        """Counter that changes whenever the server set changes."""
+        return self._version
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self._load()
+            self._loaded = True
 
     def _load(self) -> None:
         """Load configuration from disk."""
         if self.CONFIG_FILE.exists():
             try:
-                with open(self.CONFIG_FILE) as f:
-                    data = json.load(f)
+                data = _loads(self.CONFIG_FILE.read_bytes())
                 self._config = McpConfig(
                     version=data.get("version", 1),
                     servers=data.get("servers", {}),
                 )
-            except (json.JSONDecodeError, OSError):
+                self._intern_config_keys()
+            except (ValueError, OSError):  # Includes JSON and UTF-8 decode errors
                 self._config = McpConfig()
         else:
             self._config = McpConfig()
+        self._rebuild_entries()
+
+    def _intern_config_keys(self) -> None:
+        """Intern server config keys parsed from JSON.
+
+        Key literals in this package are interned by the compiler, so lookups
+        with interned keys match on identity without comparing characters.
+        """
+        for data in self._config.servers.values():
+            config = data.get("config")
+            if isinstance(config, dict):
+                data["config"] = {sys.intern(k): v for k, v in config.items()}
+
+    def _rebuild_entries(self) -> None:
+        """Recreate the server entries from the raw configuration."""
+        self._entries = {
+            name: McpServerEntry(
+                name=name,
+                enabled=data.get("enabled", True),
+                config=data.get("config", {}),
+            )
+            for name, data in self._config.servers.items()
+        }
+        enabled = 0
+        env_vars: set[str] = set()
+        for entry in self._entries.values():
+            if entry.enabled:
+                enabled += 1
+                env_vars |= entry.env_vars
+        self._enabled_count = enabled
+        self._sdk_env_vars = tuple(sorted(env_vars))
 
     def _save(self) -> None:
-        """Save configuration to disk."""
+        """Atomically save configuration to disk."""
         self.CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-        with open(self.CONFIG_FILE, "w") as f:
-            json.dump(
-                {"version": self._config.version, "servers": self._config.servers},
-                f,
-                indent=2,
-            )
+        tmp_file = self.CONFIG_FILE.with_suffix(".json.tmp")
+        tmp_file.write_bytes(
+            _dumps({"version": self._config.version, "servers": self._config.servers})
+        )
+        os.replace(tmp_file, self.CONFIG_FILE)
+        self._dirty = False
+
+    def _changed(self) -> None:
+        """Record a change and save it unless a batch is open."""
+        self._version += 1
+        self._dirty = True
+        self._rebuild_entries()
+        if not self._in_batch:
+            self._save()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Group several changes into a single save when the block exits."""
+        if self._in_batch:
+            yield
+            return
+        self._in_batch = True
+        try:
+            yield
+        finally:
+            self._in_batch = False
+            if self._dirty:
+                self._save()
 
     def list_servers(self) -> list[McpServerEntry]:
         """List all configured servers."""
-        entries = []
-        for name, data in self._config.servers.items():
-            entries.append(
-                McpServerEntry(
-                    name=name,
-                    enabled=data.get("enabled", True),
-                    config=data.get("config", {}),
-                )
-            )
-        return entries
+        self._ensure_loaded()
+        return list(self._entries.values())
 
     def get_server(self, name: str) -> McpServerEntry | None:
         """Get a specific server by name."""
-        if name not in self._config.servers:
-            return None
-        data = self._config.servers[name]
-        return McpServerEntry(
-            name=name,
-            enabled=data.get("enabled", True),
-            config=data.get("config", {}),
-        )
+        self._ensure_loaded()
+        return self._entries.get(name)
+
+    def len_servers(self) -> int:
+        """Number of configured servers."""
+        self._ensure_loaded()
+        return len(self._entries)
+
+    def enabled_count(self) -> int:
+        """Number of enabled servers."""
+        self._ensure_loaded()
+        return self._enabled_count
 
     def add_server(self, name: str, config: dict[str, Any]) -> None:
         """Add a new server configuration."""
+        self._ensure_loaded()
         self._config.servers[name] = {"enabled": True, "config": config}
-        self._save()
+        self._changed()
 
     def remove_server(self, name: str) -> bool:
         """Remove a server configuration. Returns True if removed."""
-        if name in self._config.servers:
-            del self._config.servers[name]
-            self._save()
-            return True
-        return False
+        self._ensure_loaded()
+        data = self._config.servers.pop(name, None)
+        if data is None:
+            return False
+        self._changed()
+        return True
 
     def enable_server(self, name: str) -> bool:
         """Enable a server. Returns True if server exists."""
-        if name in self._config.servers:
-            self._config.servers[name]["enabled"] = True
-            self._save()
-            return True
-        return False
+        self._ensure_loaded()
+        data = self._config.servers.get(name)
+        if data is None:
+            return False
+        if not data.get("enabled", True):
+            data["enabled"] = True
+            self._changed()
+        return True
 
     def disable_server(self, name: str) -> bool:
         """Disable a server. Returns True if server exists."""
-        if name in self._config.servers:
-            self._config.servers[name]["enabled"] = False
-            self._save()
-            return True
-        return False
+        self._ensure_loaded()
+        data = self._config.servers.get(name)
+        if data is None:
+            return False
+        if data.get("enabled", True):
+            data["enabled"] = False
+            self._changed()
+        return True
 
     def _expand_env_vars(self, value: Any) -> Any:
-        """Recursively expand environment variables in config values."""
+        """Expand environment variables in config values.
+
+        Nested dicts and lists are copied with an explicit stack instead of
+        recursion, so deep configs cannot hit the recursion limit.
+        """
         if isinstance(value, str):
-            # Match ${VAR_NAME} pattern
-            pattern = r"\$\{([^}]+)\}"
-            matches = re.findall(pattern, value)
-            result = value
-            for var_name in matches:
-                env_value = os.environ.get(var_name, "")
-                result = result.replace(f"${{{var_name}}}", env_value)
-            return result
-        elif isinstance(value, dict):
-            return {k: self._expand_env_vars(v) for k, v in value.items()}
-        elif isinstance(value, list):
-            return [self._expand_env_vars(item) for item in value]
-        return value
+            return _ENV_VAR_RE.sub(_env_value, value) if "$" in value else value
+        if not isinstance(value, (dict, list)):
+            return value
+        root: dict | list = {} if isinstance(value, dict) else []
+        stack: list[tuple[dict | list, dict | list]] = [(value, root)]
+        while stack:
+            source, copy = stack.pop()
+            items = source.items() if isinstance(source, dict) else enumerate(source)
+            for key, item in items:
+                if isinstance(item, str):
+                    if "$" in item:
+                        item = _ENV_VAR_RE.sub(_env_value, item)
+                elif isinstance(item, (dict, list)):
+                    child: dict | list = {} if isinstance(item, dict) else []
+                    stack.append((item, child))
+                    item = child
+                if isinstance(copy, dict):
+                    copy[key] = item
+                else:
+                    copy.append(item)
+        return root
 
     def get_enabled_servers_for_sdk(self) -> dict[str, dict[str, Any]]:
-        """Get enabled servers in SDK-compatible format with env vars expanded."""
+        """Get enabled servers in SDK-compatible format with env vars expanded.
+
+        The result is reused until the config or a referenced variable changes,
+        and configs without references are returned as stored, so treat it as
+        read-only.
+        """
+        self._ensure_loaded()
+        environ = os.environ
+        key = (
+            self._version,
+            tuple(environ.get(var) for var in self._sdk_env_vars),
+        )
+        if self._sdk_cache is not None and self._sdk_cache[0] == key:
+            return self._sdk_cache[1]
         result = {}
-        for name, data in self._config.servers.items():
-            if data.get("enabled", True):
-                config = data.get("config", {})
-                result[name] = self._expand_env_vars(config)
+        for name, entry in self._entries.items():
+            if entry.enabled:
+                config = entry.config
+                result[name] = self._expand_env_vars(config) if entry.env_vars else config
+        self._sdk_cache = (key, result)
         return result
@@ -1,10 +1,22 @@
+from functools import lru_cache
+from itertools import cycle
+
 from textual.binding import Binding
+from textual.geometry import Size
 from textual.reactive import reactive
-from textual.widgets import Input, Static
+from textual.widgets import Input, RichLog, Static
 
 from claude.history import CommandHistory
 
 
+@lru_cache(maxsize=128)
+def _format_status(tutor_on: bool, web_on: bool, mcp_count: int) -> str:
+    tutor = "on" if tutor_on else "off"
+    web = "on" if web_on else "off"
+    mcp = f"{mcp_count} server{'s' if mcp_count != 1 else ''}"
+    return f"tutor: {tutor}  ·  web: {web}  ·  mcp: {mcp}"
+
+
 class StatusBar(Static):
     """Reactive status bar showing tutor/web/mcp states."""
 
@@ -13,18 +25,17 @@ class StatusBar(Static):
     mcp_count: reactive[int] = reactive(0)
 
     def render(self) -> str:
-        tutor = "on" if self.tutor_on else "off"
-        web = "on" if self.web_on else "off"
-        mcp = f"{self.mcp_count} server{'s' if self.mcp_count != 1 else ''}"
-        return f"tutor: {tutor}  ·  web: {web}  ·  mcp: {mcp}"
+        return _format_status(self.tutor_on, self.web_on, self.mcp_count)
 
 
 class ASCIISpinner(Static):
     """Minimal spinner that cycles through frames with a label."""
 
     SPINNER_FRAMES = ["·  ", "·· ", "···", " ··", "  ·", "   "]
+    # Frames with the separator before the label already appended
+    _RENDERED_FRAMES = tuple(f"{frame} " for frame in SPINNER_FRAMES)
 
-    _frame: reactive[int] = reactive(0)
+    _current: reactive[str] = reactive("")
     _label: reactive[str] = reactive("")
     _running: reactive[bool] = reactive(False)
 
@@ -32,18 +43,20 @@ class ASCIISpinner(Static):
         super().__init__(**kwargs)
         self._label = label
         self._timer = None
+        self._frames = cycle(self._RENDERED_FRAMES)
+        self.display = False  # Hidden until started
 
     def render(self) -> str:
         if not self._running:
             return ""
-        frame = self.SPINNER_FRAMES[self._frame % len(self.SPINNER_FRAMES)]
-        return f"{frame} {self._label}"
+        return self._current + self._label
 
     def start(self, label: str = "Processing query...") -> None:
         """Start the spinner animation."""
         self._label = label
         self._running = True
-        self._frame = 0
+        self._frames = cycle(self._RENDERED_FRAMES)
+        self._current = next(self._frames)
         self.display = True
         if self._timer is None:
             self._timer = self.set_interval(0.1, self._advance_frame)
@@ -59,7 +72,38 @@ class ASCIISpinner(Static):
     def _advance_frame(self) -> None:
         """Advance to the next spinner frame."""
         if self._running:
-            self._frame = (self._frame + 1) % len(self.SPINNER_FRAMES)
+            self._current = next(self._frames)
+
+
+class ChatLog(RichLog):
+    """RichLog that can rewrite its most recent entry in place.
+
+    Rewriting relies on RichLog internals. When a Textual release lacks them,
+    or writes are still deferred until the size is known, mark() returns None
+    and callers append instead.
+    """
+
+    # Private RichLog attributes read by mark() and truncate()
+    _INTERNALS = ("_start_line", "_line_cache", "_widest_line_width", "_deferred_renders")
+
+    def mark(self) -> int | None:
+        """Return a marker for the current end of the log, or None if the
+        log cannot be truncated right now."""
+        if not all(hasattr(self, name) for name in self._INTERNALS):
+            return None
+        if self._deferred_renders:
+            return None  # Queued writes are not in self.lines yet
+        return self._start_line + len(self.lines)
+
+    def truncate(self, marker: int) -> None:
+        """Drop every line written after a marker returned by mark()."""
+        keep = max(marker - self._start_line, 0)
+        if keep >= len(self.lines):
+            return
+        del self.lines[keep:]
+        self._line_cache.clear()
+        self.virtual_size = Size(self._widest_line_width, len(self.lines))
+        self.refresh()
 
 
 class HistoryInput(Input):